@@ -1,7 +1,21 @@
 import json
 import requests
-import datetime
 import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 ENTRY_TYPE_NOTE = 1
 ENTRY_TYPE_ERROR = 4
@@ -10,11 +24,79 @@ FORMAT_TEXT = 'text'
 FORMAT_JSON = 'json'
 FORMAT_MARKDOWN = 'markdown'
 
+# Contents types reported as JSON; parsed API bodies are always plain dicts and lists.
+_JSON_TYPES = frozenset({dict, list})
+
+# Clients survive across commands in a warm engine so the keep-alive pool is reused.
+_CLIENT_CACHE = {}
+
+# Pooled sessions shared by every client built with the same API token. Base URL and
+# certificate verification are per-request settings, so they do not split the pool.
+_SESSION_CACHE = {}
+
+# (connect, read) timeouts in seconds; a stalled handshake must not hold a pool slot.
+_CONNECT_TIMEOUT = 5
+_READ_TIMEOUT = 15
+
+# Longest sleep between retries, whether from backoff or a server's Retry-After header.
+_RETRY_WAIT_MAX = 2
+
+# Bytes of an error response body kept for the LifxAPIError message.
+_ERROR_BODY_MAX = 2048
+
+# Most alerts one lifx-alert-flash-batch call accepts; each alert is one API request.
+_ALERT_BATCH_MAX = 50
+
+# Worker threads used by LifxClient.map to run independent calls concurrently.
+_MAP_WORKERS = 8
+
+# Request bodies are sent compact and UTF-8 encoded rather than through requests' json=;
+# orjson.dumps is used instead when it is installed.
+_compact = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+# Markdown table row templates, filled with str.format_map.
+_LIGHT_ROW_TMPL = "| {id} | {label} | {power} | {connected} | {group} | {location} | {color} | {brightness} |\n"
+_LIGHT_COLOR_TMPL = "h:{hue}, s:{saturation}, k:{kelvin}"
+_SCENE_ROW_TMPL = "| {name} | {uuid} | {lights} | {created} | {updated} |\n"
+_SCENE_STATE_ROW_TMPL = "| {index} | {selector} | {brightness} | {hue} | {saturation} | {kelvin} |\n"
+
+# Parsed GET bodies kept per client for ETag revalidation (If-None-Match -> 304).
+_ETAG_CACHE_SIZE = 32
+
+# Upper bound on prepared request templates kept per client (one per method + path).
+_PREPARED_CACHE_SIZE = 64
+
+# Above this many items the verbose raw JSON block is dumped compact and capped in length;
+# the full objects are always available in the entry contents.
+_VERBOSE_PRETTY_MAX_ITEMS = 100
+_VERBOSE_MAX_CHARS = 200_000
+
+
+if orjson is not None:
+    def _dumps_pretty(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    def _dumps_compact(obj):
+        return orjson.dumps(obj).decode()
+
+    _dumps_body = orjson.dumps
+    _loads = orjson.loads
+else:
+    def _dumps_pretty(obj):
+        return json.dumps(obj, indent=2)
+
+    _dumps_compact = _compact
+
+    def _dumps_body(obj):
+        return _compact(obj).encode("utf-8")
+
+    _loads = json.loads
+
 
 def make_note_entry(human_readable, contents=None, context=None):
     entry = {
         'Type': ENTRY_TYPE_NOTE,
-        'ContentsFormat': FORMAT_JSON if isinstance(contents, (dict, list)) else FORMAT_TEXT,
+        'ContentsFormat': FORMAT_JSON if type(contents) in _JSON_TYPES else FORMAT_TEXT,
         'Contents': contents if contents is not None else human_readable,
         'ReadableContentsFormat': FORMAT_MARKDOWN,
         'HumanReadable': human_readable,
@@ -34,42 +116,155 @@ def make_error_entry(message):
     }
 
 
+class LifxAPIError(Exception):
+    # Keeps a bounded prefix of the error body and only decodes it, as UTF-8 rather than
+    # letting resp.text guess the charset, when the message is actually formatted.
+    def __init__(self, resp):
+        super().__init__(resp.status_code)
+        self.status_code = resp.status_code
+        self.body = resp.content[:_ERROR_BODY_MAX]
+
+    def __str__(self):
+        return f"LIFX API error {self.status_code}: {self.body.decode('utf-8', 'replace')}"
+
+
+def _raise_for_status(resp):
+    if resp.status_code >= 400:
+        raise LifxAPIError(resp)
+
+
+class _LifxRetry(Retry):
+    # A 502/504 can arrive after LIFX already applied the request, so those are only
+    # retried for the idempotent methods in allowed_methods. 429 and 503 mean the request
+    # was not processed, so they are retried for every method, POST toggles and effects
+    # included.
+    UNPROCESSED_STATUSES = frozenset([429, 503])
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code in self.UNPROCESSED_STATUSES:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response):
+        # Honour Retry-After, but never sleep longer than a backoff step may.
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, _RETRY_WAIT_MAX)
+
+
 class LifxClient:
-    def __init__(self, base_url, api_token, verify=True, proxy=False):
+    def __init__(self, base_url, api_token, verify=True, proxy=False, timeout=_READ_TIMEOUT):
         self.base_url = (base_url or "").rstrip("/")
         self.api_token = api_token
         self.verify = bool(verify)
+        self.timeout = (_CONNECT_TIMEOUT, float(timeout or _READ_TIMEOUT))
+
+        self.session = _SESSION_CACHE.get(api_token)
+        if self.session is None:
+            self.session = _SESSION_CACHE[api_token] = self._new_session(api_token)
 
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Proxy/CA settings from the environment are merged once per client.
+        self._send_kwargs = self.session.merge_environment_settings(
+            self.base_url, {}, False, self.verify, None
+        )
+        self._send_kwargs["timeout"] = self.timeout
+        # Prepared (method, path) templates with the session headers already merged.
+        self._prepared = {}
+        # path -> (etag, parsed body) for conditional GETs, least recently used first.
+        self._etag_cache = OrderedDict()
+
+    @staticmethod
+    def _new_session(api_token):
+        session = requests.Session()
+        session.headers.update({
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
         })
 
-    def _request(self, method, path, json_data=None, params=None, raw_response=False):
-        url = self.base_url + path
-        resp = self.session.request(
-            method=method,
-            url=url,
-            json=json_data,
-            params=params,
-            verify=self.verify,
+        # Transient 429/5xx responses are retried inside urllib3 on the pooled
+        # connection; the final response is still returned to _request. Read
+        # timeouts are not retried, and each wait between attempts (backoff or
+        # Retry-After) is capped at _RETRY_WAIT_MAX, so a call takes at most
+        # 4 attempts' timeouts plus 3 * _RETRY_WAIT_MAX seconds.
+        retry = _LifxRetry(
+            total=3,
+            read=0,
+            backoff_factor=0.3,
+            backoff_max=_RETRY_WAIT_MAX,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "PUT"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
         )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=16)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _request(self, method, path, json_data=None, params=None, raw_response=False, raw_stream=False):
+        body = None
+        if json_data is not None:
+            body = _dumps_body(json_data)
+
+        send_kwargs = self._send_kwargs
+        if raw_stream:
+            send_kwargs = dict(send_kwargs, stream=True)
+
+        prep = self._prepared.get((method, path))
+        if prep is None:
+            if len(self._prepared) >= _PREPARED_CACHE_SIZE:
+                self._prepared.clear()
+            prep = self._prepared[(method, path)] = self.session.prepare_request(
+                requests.Request(method=method, url=self.base_url + path)
+            )
+
+        prep = prep.copy()
+        if params:
+            prep.prepare_url(prep.url, params)
+        if body is not None:
+            # The body is already encoded bytes; patch it in rather than re-running prepare_body.
+            # Bodiless templates carry the Content-Length requests computed when they were prepared.
+            prep.body = body
+            prep.headers["Content-Length"] = str(len(body))
+
+        cacheable = method == "GET" and not raw_response and not params
+        cached = self._etag_cache.get(path) if cacheable else None
+        if cached is not None:
+            prep.headers["If-None-Match"] = cached[0]
+
+        resp = self.session.send(prep, **send_kwargs)
         if raw_response:
             return resp
-        if resp.status_code >= 400:
-            raise Exception(f"LIFX API error {resp.status_code}: {resp.text}")
+        if cached is not None and resp.status_code == 304:
+            resp.close()
+            self._etag_cache.move_to_end(path)
+            return cached[1]
+        _raise_for_status(resp)
         try:
-            return resp.json()
+            data = _loads(resp.content)
         except Exception:
             return resp.text
 
-    def list_lights(self, selector='all'):
+        etag = resp.headers.get("ETag")
+        if cacheable and etag:
+            self._etag_cache[path] = (etag, data)
+            self._etag_cache.move_to_end(path)
+            if len(self._etag_cache) > _ETAG_CACHE_SIZE:
+                self._etag_cache.popitem(last=False)
+        return data
+
+    def list_lights(self, selector="all"):
         return self._request("GET", f"/lights/{selector}")
 
     def set_state(self, selector, payload):
         return self._request("PUT", f"/lights/{selector}/state", json_data=payload)
 
+    def set_states(self, payload):
+        return self._request("PUT", "/lights/states", json_data=payload)
+
     def toggle_power(self, selector, payload):
         return self._request("POST", f"/lights/{selector}/toggle", json_data=payload)
 
@@ -90,46 +285,139 @@ class LifxClient:
             raw_response=True,
         )
 
-    def get_with_headers(self, path):
-        resp = self._request("GET", path, raw_response=True)
+    def _stream_lights(self, selector="all"):
+        # Yields light objects one at a time as the response array is parsed off the
+        # socket. Falls back to the buffered list when ijson is not installed.
+        if ijson is None:
+            lights = self.list_lights(selector)
+            yield from lights if isinstance(lights, list) else [lights]
+            return
+
+        resp = self._request("GET", f"/lights/{selector}", raw_response=True, raw_stream=True)
+        with resp:
+            _raise_for_status(resp)
+            resp.raw.decode_content = True
+            yield from ijson.items(resp.raw, "item", use_float=True)
+
+    def map(self, calls):
+        # Runs (endpoint method, *args) calls, e.g. (self.pulse_effect, selector, payload),
+        # concurrently on the pooled session and returns (result, error) pairs in order;
+        # one failure does not stop the others.
+        def run(call):
+            func, *call_args = call
+            try:
+                return func(*call_args), ""
+            except Exception as e:
+                return None, str(e)
+
+        if not calls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(_MAP_WORKERS, len(calls))) as pool:
+            return list(pool.map(run, calls))
+
+    def _request_full(self, method, path, json_data=None):
+        # Returns (parsed body or text, headers, status) without raising on HTTP errors.
+        resp = self._request(method, path, json_data=json_data, raw_response=True)
+        content = resp.content
         try:
-            data = resp.json()
+            data = _loads(content)
         except Exception:
-            data = resp.text
+            data = content.decode("utf-8", "replace")
         return data, resp.headers, resp.status_code
 
+    def get_with_headers(self, path):
+        return self._request_full("GET", path)
+
+
+_BOOL_MAP = {
+    "true": True, "yes": True, "y": True, "1": True,
+    "false": False, "no": False, "n": False, "0": False,
+}
+
+# Raw severity argument -> (normalized severity, default color, default cycles).
+_SEVERITY_TABLE = {
+    "1": ("low", "green", 3), "low": ("low", "green", 3),
+    "2": ("medium", "yellow", 5), "medium": ("medium", "yellow", 5), "moderate": ("medium", "yellow", 5),
+    "3": ("high", "orange", 7), "high": ("high", "orange", 7),
+    "4": ("critical", "red", 10), "critical": ("critical", "red", 10), "crit": ("critical", "red", 10),
+}
+_SEVERITY_FALLBACK = (None, "red", 5)
+
 
 def _bool_arg(val):
-    if val is None:
-        return None
-    v = str(val).lower().strip()
-    if v in ("true", "yes", "y", "1"):
-        return True
-    if v in ("false", "no", "n", "0"):
-        return False
-    return None
-
-
-def _normalize_severity(val):
-    if val is None:
-        return None
-    v = str(val).lower().strip()
-    mapping = {
-        "1": "low", "low": "low",
-        "2": "medium", "medium": "medium", "moderate": "medium",
-        "3": "high", "high": "high",
-        "4": "critical", "critical": "critical", "crit": "critical"
+    if val is None or isinstance(val, bool):
+        return val
+    if type(val) is int and val in (0, 1):
+        return bool(val)
+    return _BOOL_MAP.get(str(val).strip().lower())
+
+
+def _float_arg(val):
+    # Args passed from other scripts may already be numbers; skip the float() round trip.
+    if type(val) is float:
+        return val
+    return float(val)
+
+
+# (argument, coercion) pairs copied into request payloads when the argument is set.
+_STATE_FIELDS = (
+    ("power", str), ("color", str),
+    ("brightness", _float_arg), ("duration", _float_arg), ("infrared", _float_arg),
+)
+_EFFECT_FIELDS = (("color", str), ("from_color", str), ("period", _float_arg), ("cycles", _float_arg))
+_BREATHE_FIELDS = _EFFECT_FIELDS + (("peak", _float_arg),)
+_EFFECT_BOOL_FIELDS = ("persist", "power_on")
+
+
+def _build_payload(args, spec, bool_fields=()):
+    payload = {}
+    for f, coerce in spec:
+        v = args.get(f)
+        if v is not None and v != "":
+            payload[f] = coerce(v)
+    for f in bool_fields:
+        v = _bool_arg(args.get(f))
+        if v is not None:
+            payload[f] = v
+    return payload
+
+
+def _json_list_arg(val):
+    if isinstance(val, str):
+        val = json.loads(val)
+    if isinstance(val, dict):
+        return [val]
+    if not isinstance(val, list):
+        raise ValueError(f"expected a list, got {type(val).__name__}")
+    return val
+
+
+def _alert_flash_payload(args, severity_raw):
+    severity, default_color, default_cycles = _SEVERITY_TABLE.get(
+        str(severity_raw or "").strip().lower(), _SEVERITY_FALLBACK
+    )
+
+    persist = _bool_arg(args.get("persist"))
+    power_on = _bool_arg(args.get("power_on"))
+
+    payload = {
+        "color": args.get("color") or default_color,
+        "cycles": _float_arg(args.get("cycles") or default_cycles),
+        "period": _float_arg(args.get("period") or 0.7),
+        "persist": False if persist is None else persist,
+        "power_on": True if power_on is None else power_on,
     }
-    return mapping.get(v)
+    return severity, payload
 
 
-def _severity_defaults(sev):
-    return {
-        "low": ("green", 3),
-        "medium": ("yellow", 5),
-        "high": ("orange", 7),
-        "critical": ("red", 10),
-    }.get(sev, ("red", 5))
+def _raw_json_block(items):
+    if len(items) <= _VERBOSE_PRETTY_MAX_ITEMS:
+        return f"\n### Raw JSON\n```json\n{_dumps_pretty(items)}\n```\n"
+
+    raw = _dumps_compact(items)
+    if len(raw) > _VERBOSE_MAX_CHARS:
+        raw = f"{raw[:_VERBOSE_MAX_CHARS]}\n... truncated ({len(items)} items) ..."
+    return f"\n### Raw JSON\n```json\n{raw}\n```\n"
 
 
 def _fmt_ts_relative(ts):
@@ -137,225 +425,219 @@ def _fmt_ts_relative(ts):
         return "-"
     try:
         ts_int = int(ts)
-        dt = datetime.datetime.fromtimestamp(ts_int)
-        now = datetime.datetime.now()
-        delta = now - dt
-        abs_str = dt.strftime("%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return str(ts)
+    # "now" is bucketed to the minute so repeated timestamps hit the cache without
+    # the relative part going stale for longer than that.
+    return _fmt_ts_cached(ts_int, int(time.time()) // 60)
+
 
-        seconds = int(delta.total_seconds())
+_AGE_UNITS = ("year", "month", "day", "hour", "minute", "second")
+
+
+def _classify_age(seconds):
+    # Integer-only bucketing of a non-negative age into (index into _AGE_UNITS, count).
+    days = seconds // 86400
+    if days >= 365:
+        return 0, days // 365
+    if days >= 30:
+        return 1, days // 30
+    if days >= 1:
+        return 2, days
+    if seconds >= 3600:
+        return 3, seconds // 3600
+    if seconds >= 60:
+        return 4, seconds // 60
+    return 5, seconds
+
+
+@lru_cache(maxsize=4096)
+def _fmt_ts_cached(ts_int, now_minute):
+    try:
+        abs_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts_int))
+
+        seconds = int(time.time()) - ts_int
         if seconds < 0:
             return abs_str
 
-        days = seconds // 86400
-        if days >= 365:
-            years = days // 365
-            rel = f"{years} year{'s' if years != 1 else ''}"
-        elif days >= 30:
-            months = days // 30
-            rel = f"{months} month{'s' if months != 1 else ''}"
-        elif days >= 1:
-            rel = f"{days} day{'s' if days != 1 else ''}"
-        else:
-            hours = seconds // 3600
-            if hours >= 1:
-                rel = f"{hours} hour{'s' if hours != 1 else ''}"
-            else:
-                minutes = seconds // 60
-                if minutes >= 1:
-                    rel = f"{minutes} minute{'s' if minutes != 1 else ''}"
-                else:
-                    rel = f"{seconds} second{'s' if seconds != 1 else ''}"
+        unit, value = _classify_age(seconds)
+        rel = f"{value} {_AGE_UNITS[unit]}{'s' if value != 1 else ''}"
 
         return f"{abs_str} ({rel} ago)"
     except Exception:
-        return str(ts)
+        return str(ts_int)
+
+
+def _light_row(l):
+    color = l.get("color") or {}
+    if isinstance(color, dict):
+        color = _LIGHT_COLOR_TMPL.format_map(defaultdict(str, color))
+
+    return _LIGHT_ROW_TMPL.format_map({
+        "id": l.get("id", ""),
+        "label": l.get("label", ""),
+        "power": l.get("power", ""),
+        "connected": l.get("connected", ""),
+        "group": (l.get("group") or {}).get("name", ""),
+        "location": (l.get("location") or {}).get("name", ""),
+        "color": color,
+        "brightness": l.get("brightness", ""),
+    })
 
 
 def lifx_list_lights_command(client, args):
     selector = args.get("selector") or "all"
     verbose = _bool_arg(args.get("verbose"))
+    stream = _bool_arg(args.get("stream"))
+
+    if stream:
+        # Render each row as soon as its light is parsed instead of after the whole body.
+        lights, parts = [], []
+        for l in client._stream_lights(selector):
+            lights.append(l)
+            parts.append(_light_row(l))
+        rows = "".join(parts)
+    else:
+        lights = client.list_lights(selector)
+        if not isinstance(lights, list):
+            lights = [lights]
+        rows = "".join(_light_row(l) for l in lights)
 
-    lights = client.list_lights(selector)
-    if not isinstance(lights, list):
-        lights = [lights]
-
-    md = []
-    md.append(f"## LIFX Lights (selector="{selector}")
+    raw = _raw_json_block(lights) if verbose else ""
 
-")
-    md.append(
-        "| ID | Label | Power | Connected | Group | Location | Color | Brightness |
-"
-        "|----|-------|-------|-----------|-------|----------|-------|------------|
-"
+    md = (
+        f"## LIFX Lights (selector=\"{selector}\")\n\n"
+        "| ID | Label | Power | Connected | Group | Location | Color | Brightness |\n"
+        "|----|-------|-------|-----------|-------|----------|-------|------------|\n"
+        f"{rows}{raw}"
     )
 
-    for l in lights:
-        lid = l.get("id", "")
-        label = l.get("label", "")
-        power = l.get("power", "")
-        connected = l.get("connected", "")
-        group = (l.get("group") or {}).get("name", "")
-        location = (l.get("location") or {}).get("name", "")
-        color = l.get("color") or {}
-        if isinstance(color, dict):
-            color_str = f"h:{color.get('hue','')}, s:{color.get('saturation','')}, k:{color.get('kelvin','')}"
-        else:
-            color_str = str(color)
-        brightness = l.get("brightness", "")
-
-        md.append(
-            f"| {lid} | {label} | {power} | {connected} | {group} | {location} | {color_str} | {brightness} |
-"
-        )
-
-    if verbose:
-        md.append("
-### Raw JSON
-```json
-")
-        md.append(json.dumps(lights, indent=2))
-        md.append("
-```
-")
-
-    demisto.results(make_note_entry("".join(md), lights, {"LIFX.Light": lights}))
+    demisto.results(make_note_entry(md, lights, {"LIFX.Light": lights}))
 
 
 def lifx_set_state_command(client, args):
     selector = args.get("selector") or "all"
-    payload = {}
-
-    for f in ("power", "color"):
-        if args.get(f):
-            payload[f] = args.get(f)
-
-    for f in ("brightness", "duration", "infrared"):
-        if args.get(f) is not None:
-            payload[f] = float(args[f])
-
-    fast = _bool_arg(args.get("fast"))
-    if fast is not None:
-        payload["fast"] = fast
+    payload = _build_payload(args, _STATE_FIELDS, ("fast",))
 
     if not payload:
         demisto.results(make_error_entry("No state fields were provided."))
         return
 
     result = client.set_state(selector, payload)
-    md = []
-    md.append(f"## LIFX Set State (selector="{selector}")
+    md = f"## LIFX Set State (selector=\"{selector}\")\n\n```json\n{_dumps_pretty(result)}\n```\n"
+
+    demisto.results(make_note_entry(md, result, {"LIFX.State": result}))
+
+
+def lifx_set_states_command(client, args):
+    states = args.get("states")
+    if not states:
+        demisto.results(make_error_entry("states argument is required for lifx-set-states"))
+        return
 
-")
-    md.append("```json
-")
-    md.append(json.dumps(result, indent=2))
-    md.append("
-```
-")
+    try:
+        states = _json_list_arg(states)
+    except ValueError as e:
+        demisto.results(make_error_entry(f"states must be a JSON list of state objects: {e}"))
+        return
+
+    defaults = _build_payload(args, _STATE_FIELDS, ("fast",))
+
+    payload = {"states": states}
+    if defaults:
+        payload["defaults"] = defaults
+
+    result = client.set_states(payload)
 
-    demisto.results(make_note_entry("".join(md), result, {"LIFX.State": result}))
+    md = f"## LIFX Set States ({len(states)} operations)\n\n```json\n{_dumps_pretty(result)}\n```\n"
+
+    demisto.results(make_note_entry(md, result, {"LIFX.States": result}))
 
 
 def lifx_toggle_power_command(client, args):
     selector = args.get("selector") or "all"
     payload = {}
 
-    if args.get("duration"):
-        payload["duration"] = float(args["duration"])
+    duration = args.get("duration")
+    if duration:
+        payload["duration"] = _float_arg(duration)
 
     result = client.toggle_power(selector, payload)
 
-    md = []
-    md.append(f"## LIFX Toggle Power (selector="{selector}")
-
-")
-    md.append("```json
-")
-    md.append(json.dumps(result, indent=2))
-    md.append("
-```
-")
+    md = f"## LIFX Toggle Power (selector=\"{selector}\")\n\n```json\n{_dumps_pretty(result)}\n```\n"
 
-    demisto.results(make_note_entry("".join(md), result, {"LIFX.Toggle": result}))
+    demisto.results(make_note_entry(md, result, {"LIFX.Toggle": result}))
 
 
 def lifx_breathe_effect_command(client, args):
     selector = args.get("selector") or "all"
-    if not args.get("color"):
+    color = args.get("color")
+    if not color:
         demisto.results(make_error_entry("color argument is required for lifx-breathe-effect"))
         return
 
-    payload = {"color": args.get("color")}
-
-    if args.get("from_color"):
-        payload["from_color"] = args.get("from_color")
-
-    for f in ("period", "cycles", "peak"):
-        if args.get(f):
-            payload[f] = float(args[f])
-
-    persist = _bool_arg(args.get("persist"))
-    if persist is not None:
-        payload["persist"] = persist
-
-    power_on = _bool_arg(args.get("power_on"))
-    if power_on is not None:
-        payload["power_on"] = power_on
+    payload = _build_payload(args, _BREATHE_FIELDS, _EFFECT_BOOL_FIELDS)
 
     result = client.breathe_effect(selector, payload)
 
-    md = []
-    md.append(f"## LIFX Breathe Effect (selector="{selector}")
+    md = f"## LIFX Breathe Effect (selector=\"{selector}\")\n\n```json\n{_dumps_pretty(result)}\n```\n"
 
-")
-    md.append("```json
-")
-    md.append(json.dumps(result, indent=2))
-    md.append("
-```
-")
-
-    demisto.results(make_note_entry("".join(md), result, {"LIFX.Breathe": result}))
+    demisto.results(make_note_entry(md, result, {"LIFX.Breathe": result}))
 
 
 def lifx_pulse_effect_command(client, args):
     selector = args.get("selector") or "all"
-    if not args.get("color"):
+    color = args.get("color")
+    if not color:
         demisto.results(make_error_entry("color argument is required for lifx-pulse-effect"))
         return
 
-    payload = {"color": args.get("color")}
-
-    if args.get("from_color"):
-        payload["from_color"] = args.get("from_color")
-
-    for f in ("period", "cycles"):
-        if args.get(f):
-            payload[f] = float(args[f])
-
-    persist = _bool_arg(args.get("persist"))
-    if persist is not None:
-        payload["persist"] = persist
-
-    power_on = _bool_arg(args.get("power_on"))
-    if power_on is not None:
-        payload["power_on"] = power_on
+    payload = _build_payload(args, _EFFECT_FIELDS, _EFFECT_BOOL_FIELDS)
 
     result = client.pulse_effect(selector, payload)
 
-    md = []
-    md.append(f"## LIFX Pulse Effect (selector="{selector}")
-
-")
-    md.append("```json
-")
-    md.append(json.dumps(result, indent=2))
-    md.append("
-```
-")
+    md = f"## LIFX Pulse Effect (selector=\"{selector}\")\n\n```json\n{_dumps_pretty(result)}\n```\n"
+
+    demisto.results(make_note_entry(md, result, {"LIFX.Pulse": result}))
+
+
+def _scene_state_row(i, st):
+    state_obj = st.get("state", st)
+    color = state_obj.get("color", {}) or {}
+
+    return _SCENE_STATE_ROW_TMPL.format_map({
+        "index": i,
+        "selector": (
+            st.get("selector")
+            or state_obj.get("selector")
+            or state_obj.get("label")
+            or state_obj.get("serial_number")
+            or "-"
+        ),
+        "brightness": state_obj.get("brightness", ""),
+        "hue": color.get("hue", state_obj.get("hue", "")),
+        "saturation": color.get("saturation", state_obj.get("saturation", "")),
+        "kelvin": color.get("kelvin", state_obj.get("kelvin", "")),
+    })
+
+
+def _render_scene(idx, s):
+    states = s.get("states") or s.get("lights") or []
+    if states:
+        table = (
+            "| Index | Selector | Brightness | Hue | Saturation | Kelvin |\n"
+            "|------:|----------|-----------:|----:|-----------:|-------:|\n"
+            + "".join(_scene_state_row(i, st) for i, st in enumerate(states, start=1))
+        )
+    else:
+        table = "_No lights found in this scene._\n"
 
-    demisto.results(make_note_entry("".join(md), result, {"LIFX.Pulse": result}))
+    return (
+        "\n---\n"
+        f"### Scene {idx}: `{s.get('name', '-')}`\n\n"
+        f"**UUID:** `{s.get('uuid', '-')}`\n\n"
+        f"{table}"
+    )
 
 
 def lifx_list_scenes_command(client, args):
@@ -365,89 +647,27 @@ def lifx_list_scenes_command(client, args):
     if not isinstance(scenes, list):
         scenes = [scenes]
 
-    md = []
-    md.append("## LIFX Scenes
-
-")
-    md.append(
-        "| Name | UUID | Lights | Created At | Updated At |
-"
-        "|------|------|--------|------------|------------|
-"
+    summary = "".join(
+        _SCENE_ROW_TMPL.format_map({
+            "name": s.get("name", "-"),
+            "uuid": s.get("uuid", "-"),
+            "lights": len(s.get("states") or s.get("lights") or []),
+            "created": _fmt_ts_relative(s.get("created_at")),
+            "updated": _fmt_ts_relative(s.get("updated_at")),
+        })
+        for s in scenes
+    )
+    details = "".join(_render_scene(idx, s) for idx, s in enumerate(scenes, start=1))
+    raw = _raw_json_block(scenes) if verbose else ""
+
+    md = (
+        "## LIFX Scenes\n\n"
+        "| Name | UUID | Lights | Created At | Updated At |\n"
+        "|------|------|--------|------------|------------|\n"
+        f"{summary}{details}{raw}"
     )
 
-    for s in scenes:
-        name = s.get("name", "-")
-        uuid = s.get("uuid", "-")
-        states = s.get("states") or s.get("lights") or []
-
-        created = _fmt_ts_relative(s.get("created_at"))
-        updated = _fmt_ts_relative(s.get("updated_at"))
-
-        md.append(
-            f"| {name} | {uuid} | {len(states)} | {created} | {updated} |
-"
-        )
-
-    for idx, s in enumerate(scenes, start=1):
-        name = s.get("name", "-")
-        uuid = s.get("uuid", "-")
-
-        md.append("
----
-")
-        md.append(f"### Scene {idx}: `{name}`
-
-")
-        md.append(f"**UUID:** `{uuid}`
-
-")
-
-        states = s.get("states") or s.get("lights") or []
-        if states:
-            md.append(
-                "| Index | Selector | Brightness | Hue | Saturation | Kelvin |
-"
-                "|------:|----------|-----------:|----:|-----------:|-------:|
-"
-            )
-            for i, st in enumerate(states, start=1):
-                state_obj = st.get("state", st)
-
-                selector = (
-                    st.get("selector")
-                    or state_obj.get("selector")
-                    or state_obj.get("label")
-                    or state_obj.get("serial_number")
-                    or "-"
-                )
-
-                brightness = state_obj.get("brightness", "")
-                color = state_obj.get("color", {}) or {}
-
-                hue = color.get("hue", state_obj.get("hue", ""))
-                sat = color.get("saturation", state_obj.get("saturation", ""))
-                kelvin = color.get("kelvin", state_obj.get("kelvin", ""))
-
-                md.append(
-                    f"| {i} | {selector} | {brightness} | {hue} | {sat} | {kelvin} |
-"
-                )
-        else:
-            md.append("_No lights found in this scene._
-")
-
-    if verbose:
-        md.append("
-### Raw JSON
-```json
-")
-        md.append(json.dumps(scenes, indent=2))
-        md.append("
-```
-")
-
-    demisto.results(make_note_entry("".join(md), scenes, {"LIFX.Scene": scenes}))
+    demisto.results(make_note_entry(md, scenes, {"LIFX.Scene": scenes}))
 
 
 def lifx_activate_scene_command(client, args):
@@ -457,8 +677,9 @@ def lifx_activate_scene_command(client, args):
         return
 
     payload = {}
-    if args.get("duration"):
-        payload["duration"] = float(args["duration"])
+    duration = args.get("duration")
+    if duration:
+        payload["duration"] = _float_arg(duration)
 
     fast = _bool_arg(args.get("fast"))
     if fast is not None:
@@ -467,61 +688,98 @@ def lifx_activate_scene_command(client, args):
     resp = client.activate_scene(uuid, payload)
     result = {"status": resp.status_code}
 
-    md = []
-    md.append("## LIFX Activate Scene
-
-")
-    md.append(f"Scene UUID: `{uuid}`  
-")
-    md.append(f"HTTP Status: `{resp.status_code}`
-")
+    md = (
+        "## LIFX Activate Scene\n\n"
+        f"Scene UUID: `{uuid}`  \n"
+        f"HTTP Status: `{resp.status_code}`\n"
+    )
 
-    demisto.results(make_note_entry("".join(md), result, {"LIFX.SceneActivation": result}))
+    demisto.results(make_note_entry(md, result, {"LIFX.SceneActivation": result}))
 
 
 def lifx_alert_flash_command(client, args):
     selector = args.get("selector") or "all"
     severity_raw = args.get("severity")
-    severity = _normalize_severity(severity_raw)
+    severity, payload = _alert_flash_payload(args, severity_raw)
 
-    if severity:
-        default_color, default_cycles = _severity_defaults(severity)
-    else:
-        default_color, default_cycles = ("red", 5)
+    result = client.pulse_effect(selector, payload)
 
-    color = args.get("color") or default_color
-    cycles = float(args.get("cycles") or default_cycles)
-    period = float(args.get("period") or 0.7)
+    md = (
+        "## LIFX Alert Flash\n\n"
+        f"- Selector: `{selector}`\n"
+        f"- Severity: `{severity_raw}` (normalized: `{severity}`)\n"
+        f"- Color: `{payload['color']}`\n"
+        f"- Cycles: `{payload['cycles']}`\n"
+        f"- Period: `{payload['period']}`\n"
+    )
 
-    persist = _bool_arg(args.get("persist"))
-    power_on = _bool_arg(args.get("power_on"))
+    demisto.results(make_note_entry(md, result, {"LIFX.AlertFlash": result}))
 
-    payload = {
-        "color": color,
-        "cycles": cycles,
-        "period": period,
-        "persist": False if persist is None else persist,
-        "power_on": True if power_on is None else power_on,
-    }
 
-    result = client.pulse_effect(selector, payload)
+def lifx_alert_flash_batch_command(client, args):
+    alerts = args.get("alerts")
+    if not alerts:
+        demisto.results(make_error_entry("alerts argument is required for lifx-alert-flash-batch"))
+        return
 
-    md = []
-    md.append("## LIFX Alert Flash
+    try:
+        alerts = _json_list_arg(alerts)
+    except ValueError as e:
+        demisto.results(make_error_entry(f"alerts must be a JSON list of alert objects: {e}"))
+        return
+    if not all(isinstance(a, dict) for a in alerts):
+        demisto.results(make_error_entry("alerts must be a JSON list of alert objects"))
+        return
+
+    if len(alerts) > _ALERT_BATCH_MAX:
+        demisto.results(make_error_entry(
+            f"lifx-alert-flash-batch accepts at most {_ALERT_BATCH_MAX} alerts, got {len(alerts)}"
+        ))
+        return
 
-")
-    md.append(f"- Selector: `{selector}`
-")
-    md.append(f"- Severity: `{severity_raw}` (normalized: `{severity}`)
-")
-    md.append(f"- Color: `{color}`
-")
-    md.append(f"- Cycles: `{cycles}`
-")
-    md.append(f"- Period: `{period}`
-")
+    default_selector = args.get("selector") or "all"
+    flashes = []
+    for alert in alerts:
+        # An alert with unusable arguments is reported in its own row, not for the batch.
+        try:
+            severity, payload = _alert_flash_payload(alert, alert.get("severity"))
+            error = ""
+        except (TypeError, ValueError) as e:
+            severity, payload, error = None, {}, f"Invalid alert arguments: {e}"
+        flashes.append((alert.get("selector") or default_selector, severity, payload, error))
+
+    outcomes = iter(client.map([
+        (client.pulse_effect, selector, payload)
+        for selector, _, payload, error in flashes if not error
+    ]))
+
+    results = []
+    for selector, severity, payload, error in flashes:
+        result = None
+        if not error:
+            result, error = next(outcomes)
+        results.append({
+            "Selector": selector,
+            "Severity": severity,
+            "Color": payload.get("color"),
+            "Cycles": payload.get("cycles"),
+            "Period": payload.get("period"),
+            "Result": result,
+            "Error": error,
+        })
+
+    rows = "".join(
+        f"| {i} | {r['Selector']} | {r['Severity']} | {r['Color']} | {r['Cycles']} | {r['Period']} | {r['Error'] or '-'} |\n"
+        for i, r in enumerate(results, start=1)
+    )
+    md = (
+        f"## LIFX Alert Flash Batch ({len(results)} alerts)\n\n"
+        "| # | Selector | Severity | Color | Cycles | Period | Error |\n"
+        "|--:|----------|----------|-------|-------:|-------:|-------|\n"
+        f"{rows}"
+    )
 
-    demisto.results(make_note_entry("".join(md), result, {"LIFX.AlertFlash": result}))
+    demisto.results(make_note_entry(md, results, {"LIFX.AlertFlashBatch": results}))
 
 
 def lifx_test_connection_command(client, args):
@@ -550,31 +808,21 @@ def lifx_test_connection_command(client, args):
     latency_ms = int((time.time() - start) * 1000)
     diag["LatencyMS"] = latency_ms
 
-    md = []
-    md.append("## LIFX Connection Test
-
-")
-    md.append("| Field | Value |
-")
-    md.append("|-------|-------|
-")
-    md.append(f"| **Base URL** | `{diag['BaseURL']}` |
-")
-    md.append(f"| **Selector** | `{diag['Selector']}` |
-")
-    md.append(f"| **Verify SSL** | `{diag['VerifySSL']}` |
-")
-    md.append(f"| **Status** | `{diag['Status']}` |
-")
-    md.append(f"| **Lights Found** | `{diag['LightsReturned']}` |
-")
-    md.append(f"| **Latency (ms)** | `{diag['LatencyMS']}` |
-")
-    md.append(f"| **Error** | `{diag['Error'] or '(none)'}` |
-")
+    md = (
+        "## LIFX Connection Test\n\n"
+        "| Field | Value |\n"
+        "|-------|-------|\n"
+        f"| **Base URL** | `{diag['BaseURL']}` |\n"
+        f"| **Selector** | `{diag['Selector']}` |\n"
+        f"| **Verify SSL** | `{diag['VerifySSL']}` |\n"
+        f"| **Status** | `{diag['Status']}` |\n"
+        f"| **Lights Found** | `{diag['LightsReturned']}` |\n"
+        f"| **Latency (ms)** | `{diag['LatencyMS']}` |\n"
+        f"| **Error** | `{diag['Error'] or '(none)'}` |\n"
+    )
 
     context = {"LIFX.ConnectionTest": {"Info": diag, "Lights": lights}}
-    demisto.results(make_note_entry("".join(md), context, context))
+    demisto.results(make_note_entry(md, context, context))
 
 
 def lifx_health_check_command(client, args):
@@ -590,26 +838,17 @@ def lifx_health_check_command(client, args):
 
     ok = 200 <= status < 400
 
-    md = []
-    md.append("## LIFX Health Check
-
-")
-    md.append("| Field | Value |
-")
-    md.append("|-------|-------|
-")
-    md.append(f"| **HTTP Status** | `{status}` |
-")
-    md.append(f"| **Latency (ms)** | `{latency_ms}` |
-")
-    md.append(f"| **Rate Limit** | `{limit}` |
-")
-    md.append(f"| **Rate Remaining** | `{remaining}` |
-")
-    md.append(f"| **Rate Reset** | `{reset}` |
-")
-    md.append(f"| **OK** | `{ok}` |
-")
+    md = (
+        "## LIFX Health Check\n\n"
+        "| Field | Value |\n"
+        "|-------|-------|\n"
+        f"| **HTTP Status** | `{status}` |\n"
+        f"| **Latency (ms)** | `{latency_ms}` |\n"
+        f"| **Rate Limit** | `{limit}` |\n"
+        f"| **Rate Remaining** | `{remaining}` |\n"
+        f"| **Rate Reset** | `{reset}` |\n"
+        f"| **OK** | `{ok}` |\n"
+    )
 
     context = {
         "LIFX.HealthCheck": {
@@ -622,7 +861,7 @@ def lifx_health_check_command(client, args):
         }
     }
 
-    demisto.results(make_note_entry("".join(md), context, context))
+    demisto.results(make_note_entry(md, context, context))
 
 
 def test_module(client):
@@ -630,47 +869,65 @@ def test_module(client):
     demisto.results("ok")
 
 
+def _timeout_param(val):
+    if val is None or val == "":
+        return _READ_TIMEOUT
+    try:
+        timeout = float(val)
+    except (TypeError, ValueError):
+        timeout = None
+    # Also rejects nan and inf, which requests cannot use as a socket timeout.
+    if timeout is None or not 0 < timeout < float("inf"):
+        raise ValueError(f"Request timeout (seconds) must be a positive number, got '{val}'")
+    return timeout
+
+
+_COMMANDS = {
+    "test-module": lambda client, args: test_module(client),
+    "lifx-list-lights": lifx_list_lights_command,
+    "lifx-set-state": lifx_set_state_command,
+    "lifx-set-states": lifx_set_states_command,
+    "lifx-toggle-power": lifx_toggle_power_command,
+    "lifx-breathe-effect": lifx_breathe_effect_command,
+    "lifx-pulse-effect": lifx_pulse_effect_command,
+    "lifx-list-scenes": lifx_list_scenes_command,
+    "lifx-activate-scene": lifx_activate_scene_command,
+    "lifx-alert-flash": lifx_alert_flash_command,
+    "lifx-alert-flash-batch": lifx_alert_flash_batch_command,
+    "lifx-test-connection": lifx_test_connection_command,
+    "lifx-health-check": lifx_health_check_command,
+}
+
+
 def main():
     params = demisto.params() or {}
     base = params.get("url")
     token = params.get("api_token")
     insecure = params.get("insecure")
 
-    client = LifxClient(
-        base_url=base,
-        api_token=token,
-        verify=not insecure,
-        proxy=params.get("proxy"),
-    )
-
     cmd = demisto.command()
     args = demisto.args()
 
+    handler = _COMMANDS.get(cmd)
+    if handler is None:
+        demisto.results(make_error_entry(f"Command '{cmd}' is not implemented."))
+        return
+
     try:
-        if cmd == "test-module":
-            test_module(client)
-        elif cmd == "lifx-list-lights":
-            lifx_list_lights_command(client, args)
-        elif cmd == "lifx-set-state":
-            lifx_set_state_command(client, args)
-        elif cmd == "lifx-toggle-power":
-            lifx_toggle_power_command(client, args)
-        elif cmd == "lifx-breathe-effect":
-            lifx_breathe_effect_command(client, args)
-        elif cmd == "lifx-pulse-effect":
-            lifx_pulse_effect_command(client, args)
-        elif cmd == "lifx-list-scenes":
-            lifx_list_scenes_command(client, args)
-        elif cmd == "lifx-activate-scene":
-            lifx_activate_scene_command(client, args)
-        elif cmd == "lifx-alert-flash":
-            lifx_alert_flash_command(client, args)
-        elif cmd == "lifx-test-connection":
-            lifx_test_connection_command(client, args)
-        elif cmd == "lifx-health-check":
-            lifx_health_check_command(client, args)
-        else:
-            demisto.results(make_error_entry(f"Command '{cmd}' is not implemented."))
+        timeout = _timeout_param(params.get("timeout"))
+
+        key = (base, token, not insecure, timeout)
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            client = _CLIENT_CACHE.setdefault(key, LifxClient(
+                base_url=base,
+                api_token=token,
+                verify=not insecure,
+                proxy=params.get("proxy"),
+                timeout=timeout,
+            ))
+
+        handler(client, args)
     except Exception as e:
         demisto.results(make_error_entry(f"Failed to execute '{cmd}'. Error: {e}"))
 